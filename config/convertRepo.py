@@ -10,6 +10,8 @@ config.datasetIgnorePatterns = ['raw', '_raw', 'raw_hdu', 'raw_amp',
                                 '*_camera', 'singleFrameDriver_metadata']
 
 # Filename globs that should be ignored instead of being treated as datasets.
+# These must stay plain glob strings: ConvertRepoTask translates them with
+# fnmatch and joins them into a single compiled expression itself.
 config.fileIgnorePatterns = ['README.txt', '*~?', 'butler.yaml',
                              'gen3.sqlite3', 'registry.sqlite3',
                              'calibRegistry.sqlite3', '_mapper',
@@ -1,3 +1,10 @@
 from .version import *
-from .dc2gen3 import DC2Converter
-from .dc2gen3 import main
+
+
+def __getattr__(name):
+    # The converter imports the gen3 butler and obs_base, which
+    # patch_dc2 does not need, so only import it when it is used.
+    if name in ("DC2Converter", "main"):
+        from . import dc2gen3
+        return getattr(dc2gen3, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
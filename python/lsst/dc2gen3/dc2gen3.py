@@ -15,6 +15,7 @@ from dataclasses import dataclass, field
 
 import yaml
 import psycopg2
+from psycopg2 import sql
 
 import lsst.log
 import lsst.log.utils
@@ -28,6 +29,8 @@ from lsst.daf.butler import Butler, DatasetType
 from lsst.daf.butler.registry import ConflictingDefinitionError
 from lsst.pipe.tasks.makeSkyMap import MakeSkyMapTask
 
+from .patch_dc2 import YAML_LOADER
+
 # constants
 
 # This is stupid, but I don't see another way to
@@ -93,6 +96,7 @@ class DC2Converter():
     butler_seed: Optional[str] = None
     processes: int = 1
     _gen3_butler: Optional[Butler] = field(hash=False, default=None)
+    _seed_config: Optional[dict] = field(hash=False, compare=False, default=None)
 
     # The __init__ method is implicitly created by the @dataclass decorator
 
@@ -112,7 +116,7 @@ class DC2Converter():
             An instance of the DC2Converter
         """
         with open(param_fname, 'r') as file_handle:
-            params = yaml.safe_load(file_handle)
+            params = yaml.load(file_handle, Loader=YAML_LOADER)
 
         # Build the arguments for the default constructor
         init_kwargs = {}
@@ -154,10 +158,7 @@ class DC2Converter():
         registry_uri : str
             The gen3 registry URI
         """
-        with open(self.butler_seed) as file_handle:
-            seed_config = yaml.load(file_handle, Loader=yaml.FullLoader)
-
-        connection_uri = seed_config['registry']['db']
+        connection_uri = self._load_seed()['registry']['db']
         return connection_uri
 
     @property
@@ -169,10 +170,7 @@ class DC2Converter():
         namespace : str
             The gen3 registry namespace (schema in the database)
         """
-        with open(self.butler_seed) as file_handle:
-            seed_config = yaml.load(file_handle, Loader=yaml.FullLoader)
-
-        namespace = seed_config['registry']['namespace']
+        namespace = self._load_seed()['registry']['namespace']
         return namespace
 
     @property
@@ -271,6 +269,20 @@ class DC2Converter():
 
         return task
 
+    def _load_seed(self):
+        """Return the butler seed configuration, reading it if needed.
+
+        Returns
+        -------
+        seed_config : dict
+            The contents of the butler seed file, parsed once and reused.
+        """
+        if self._seed_config is None:
+            with open(self.butler_seed) as file_handle:
+                self._seed_config = yaml.load(file_handle, Loader=YAML_LOADER)
+
+        return self._seed_config
+
     def _delete_gen3_repo(self, connection_uri, namespace):
         assert self.delete_old_gen3
         self._gen3_butler = None
@@ -315,27 +327,51 @@ def _empty_registry(connection_uri, namespace):
     if not approved:
         sys.exit(1)
 
-    sql_tab = f"""SELECT tablename FROM pg_tables
-                  WHERE schemaname = '{namespace}'"""
-    sql_seq = f"""SELECT c.relname relname
-                   FROM pg_class c,
-                        pg_namespace n
-                   WHERE n.oid = c.relnamespace
-                     AND c.relkind = 'S'
-                     AND n.nspname = '{namespace}'"""
+    sql_tab = """SELECT tablename FROM pg_tables
+                 WHERE schemaname = %s"""
+    sql_seq = """SELECT c.relname relname
+                 FROM pg_class c,
+                      pg_namespace n
+                 WHERE n.oid = c.relnamespace
+                   AND c.relkind = 'S'
+                   AND n.nspname = %s"""
+    # Drop everything of each kind in a single statement, rather than
+    # making a round trip to the server for every table and sequence.
     with psycopg2.connect(connection_uri) as conn:
         with conn.cursor() as cur:
-            cur.execute(sql_tab)
-            tables = cur.fetchall()
-            for table in tables:
-                lsst.log.info(f"dropping table {namespace}.{table[0]}")
-                cur.execute(f"DROP TABLE IF EXISTS {namespace}.{table[0]} CASCADE")
-        with conn.cursor() as cur:
-            cur.execute(sql_seq)
-            seqs = cur.fetchall()
-            for seq in seqs:
-                lsst.log.info(f"dropping sequence {namespace}.{seq[0]}")
-                cur.execute(f"DROP SEQUENCE IF EXISTS {namespace}.{seq[0]} CASCADE")
+            cur.execute(sql_tab, (namespace,))
+            tables = [table[0] for table in cur.fetchall()]
+            cur.execute(sql_seq, (namespace,))
+            seqs = [seq[0] for seq in cur.fetchall()]
+
+            if tables:
+                lsst.log.info(f"dropping tables {', '.join(tables)} from {namespace}")
+                cur.execute(_drop_statement("TABLE", namespace, tables))
+            if seqs:
+                lsst.log.info(f"dropping sequences {', '.join(seqs)} from {namespace}")
+                cur.execute(_drop_statement("SEQUENCE", namespace, seqs))
+
+
+def _drop_statement(kind, namespace, names):
+    """Build a statement that drops several objects in a namespace
+
+    Parameters
+    ----------
+    kind : str
+        The kind of object to drop, e.g. ``TABLE`` or ``SEQUENCE``
+    namespace : str
+        The namespace (schema in the database) holding the objects
+    names : list of str
+        The names of the objects to drop
+
+    Returns
+    -------
+    statement : psycopg2.sql.Composed
+        The DROP statement, with all identifiers quoted
+    """
+    return sql.SQL("DROP {} IF EXISTS {} CASCADE").format(
+        sql.SQL(kind),
+        sql.SQL(", ").join(sql.Identifier(namespace, name) for name in names))
 
 
 def _delete_data(gen3_root):
@@ -5,6 +5,13 @@
 # imports
 
 import argparse
+import concurrent.futures
+import ctypes
+import errno
+import fcntl
+import functools
+import mmap
+import re
 import sys
 import os
 import shutil
@@ -12,25 +19,84 @@ import sqlite3
 import pathlib
 import tempfile
 import yaml
-from contextlib import closing
+from contextlib import closing, contextmanager
 
 import lsst.log
 import lsst.log.utils
 
-from lsst.daf.persistence import Policy
-from lsst.obs.base.gen2to3.repoWalker import PathElementParser
-
 # constants
 
 DATATYPES_TO_CONVERT = ("flat", "sky", "SKY")
-POLICY_FILE = Policy.defaultPolicyFile("obs_lsst", "lsstCamMapper.yaml", "policy")
+
+# Product, file name and subdirectory of the default policy file
+DEFAULT_POLICY = ("obs_lsst", "lsstCamMapper.yaml", "policy")
+
+# Default number of threads with which to find and move files
+DEFAULT_JOBS = 8
+
+# Number of files each thread moves per task it is given
+MOVE_BATCH_SIZE = 256
+
+# Number of files moved between progress messages
+PROGRESS_INTERVAL = 1000
+
+# Suffix added to filter names, and the resulting
+# new names of the simulated DC2 filters
+FILTER_SUFFIX = "_sim_1.4"
+NEW_FILTER_NAMES = {f: f + FILTER_SUFFIX for f in ("u", "g", "r", "i", "z", "y")}
+
+# Use the libyaml C parser when pyyaml was built with it.
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Matches a single %(key)... substitution in a path template
+TEMPLATE_FIELD_RE = re.compile(r"%\((\w+)\)([-#0 +]*)(\d*)([a-zA-Z])")
+
+# The type of each key that may appear in a calib path template
+TEMPLATE_KEYS = {
+    "filter": str,
+    "raftName": str,
+    "detectorName": str,
+    "calibDate": str,
+    "detector": int,
+}
+
+# ioctl request for a copy-on-write clone of a file, from linux/fs.h
+FICLONE = (
+    getattr(fcntl, "FICLONE", 0x40049409) if sys.platform.startswith("linux") else None
+)
+
+# Columns to add to the gen2 raw table, with their types
+# and the expressions with which to fill them
+NEW_RAW_COLUMNS = {
+    "controller": ("TEXT", "'S'"),
+    "obsid": ("TEXT", "visit"),
+    "expGroup": ("TEXT", "CAST(visit AS TEXT)"),
+    "expId": ("INT", "visit"),
+}
+
+# clonefile(2), for copy-on-write clones on macOS (APFS)
+CLONEFILE = (
+    getattr(ctypes.CDLL(None, use_errno=True), "clonefile", None)
+    if sys.platform == "darwin"
+    else None
+)
+
+# Errors from in-kernel copies that mean "not supported here"
+# rather than a real failure to copy
+UNSUPPORTED_COPY_ERRNOS = (errno.EXDEV, errno.ENOSYS, errno.EOPNOTSUPP, errno.EINVAL)
+
+# Size of the buffer through which files are copied when
+# neither a clone nor an in-kernel copy is possible
+COPY_BUFFER_SIZE = 4 * 1024 * 1024
 
 # exception classes
 
 # interface functions
 
 
-def move_files(calib_root, policy_file=POLICY_FILE):
+def move_files(
+    calib_root, policy_file=None, jobs=DEFAULT_JOBS, pairs=None, dry_run=False
+):
     """Copy files from a DESC DC2 gen2 origin repo to one with modified names
     to change parsed filter names to match that expected by the gen3 butler.
 
@@ -38,28 +104,65 @@ def move_files(calib_root, policy_file=POLICY_FILE):
     ----------
     calib_root : str
         full path to the calib gen2 (POSIX) filestore
-    policy_file : str
-        Policy file from which to load templates
+    policy_file : str, optional
+        Policy file from which to load templates; if None,
+        use the lsstCam mapper policy from obs_lsst
+    jobs : int
+        number of threads with which to find and move files;
+        must be at least 1
+    pairs : iterable of tuple of str, optional
+        the current and new path of each file to move; if None,
+        find them from the templates in the policy file
+    dry_run : bool
+        only log the moves, without touching any files
 
     """
     log = lsst.log.Log.getLogger("convertRepo")
-    policy = Policy(policy_file)
-    for data_type in DATATYPES_TO_CONVERT:
 
-        if data_type == "SKY":
-            template = policy["calibrations"]["sky"]["template"]
-            template = template.replace("sky", "SKY")
-        else:
-            template = policy["calibrations"][data_type]["template"]
+    if jobs < 1:
+        raise ValueError(f"Need at least one job to move files, not {jobs}")
 
-        for old_filename, new_filename in _transform_pairs(calib_root, template):
-            log.info("Moving %s to %s", old_filename, new_filename)
-            new_dir = os.path.split(new_filename)[0]
-            try:
-                os.makedirs(new_dir)
-            except FileExistsError:
-                pass
-            shutil.move(old_filename, new_filename)
+    if pairs is None:
+        # Find the files of all data types in a single walk
+        templates = _get_templates(policy_file)
+        pairs = _transform_pairs(calib_root, *templates.values(), jobs=jobs)
+
+    if dry_run:
+        for old_filename, new_filename in pairs:
+            log.info("Would move %s to %s", old_filename, new_filename)
+        return
+
+    # Moving files is limited by filesystem latency
+    # rather than python, so do it in many threads at once.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        # Group the moves by destination directory, so that each task
+        # creates its directory once and then fills it; batches keep
+        # scheduling costs per batch rather than per file.
+        moves_by_dir = {}
+        for old_filename, new_filename in pairs:
+            new_dir = os.path.dirname(new_filename)
+            moves_by_dir.setdefault(new_dir, []).append((old_filename, new_filename))
+
+        # Logging every file at INFO costs more than moving it, so
+        # list them only at DEBUG and otherwise report progress.
+        futures = {}
+        for new_dir, moves in moves_by_dir.items():
+            for batch_start in range(0, len(moves), MOVE_BATCH_SIZE):
+                batch = moves[batch_start:batch_start + MOVE_BATCH_SIZE]
+                for old_filename, new_filename in batch:
+                    log.debug("Moving %s to %s", old_filename, new_filename)
+                futures[executor.submit(_move_batch, new_dir, batch)] = len(batch)
+
+        total = sum(futures.values())
+        moved = 0
+        for future in concurrent.futures.as_completed(futures):
+            future.result()
+            previous = moved
+            moved += futures[future]
+            if moved // PROGRESS_INTERVAL > previous // PROGRESS_INTERVAL:
+                log.info("Moved %d of %d files", moved, total)
+
+    log.info("Moved %d files in %s", moved, calib_root)
 
 
 def update_registry(gen2_root):
@@ -78,42 +181,33 @@ def update_registry(gen2_root):
     with closing(sqlite3.connect(registry_filename)) as con:
         raw_columns = [c[1] for c in con.execute("PRAGMA table_info(raw);")]
 
-        if "controller" not in raw_columns:
-            with con:
-                con.execute("ALTER TABLE raw ADD COLUMN controller TEXT;")
-                con.execute("UPDATE raw SET controller = 'S'")
-                log.info(
-                    f"Added 'controller' column to raw table of {registry_filename}"
-                )
-
-        if "obsid" not in raw_columns:
-            with con:
-                con.execute("ALTER TABLE raw ADD COLUMN obsid TEXT;")
-                con.execute("UPDATE raw SET obsid=visit")
-                log.info(f"Added 'obsid' column to raw table of {registry_filename}")
-
-        if "expGroup" not in raw_columns:
-            with con:
-                con.execute("ALTER TABLE raw ADD COLUMN expGroup TEXT;")
-                con.execute("UPDATE raw SET expGroup=CAST(visit AS TEXT)")
-                log.info(f"Added 'expGroup' column to raw table of {registry_filename}")
-
-        if "expId" not in raw_columns:
-            with con:
-                con.execute("ALTER TABLE raw ADD COLUMN expId INT;")
-                con.execute("UPDATE raw SET expId=visit")
-                log.info(f"Added 'expId' column to raw table of {registry_filename}")
+        missing_columns = [c for c in NEW_RAW_COLUMNS if c not in raw_columns]
 
         uraw_index_query = (
             "SELECT * FROM sqlite_master WHERE type='index' AND name='u_raw';"
         )
         has_uraw_index = len([r for r in con.execute(uraw_index_query)]) > 0
-        if not has_uraw_index:
-            with con:
+
+        with _bulk_transaction(con):
+            # Fill all new columns with one pass through the table.
+            for column in missing_columns:
+                column_type = NEW_RAW_COLUMNS[column][0]
+                con.execute(f"ALTER TABLE raw ADD COLUMN {column} {column_type};")
+            if missing_columns:
+                assignments = ", ".join(
+                    f"{c}={NEW_RAW_COLUMNS[c][1]}" for c in missing_columns
+                )
+                con.execute(f"UPDATE raw SET {assignments}")
+
+            if not has_uraw_index:
                 con.execute(
                     "CREATE UNIQUE INDEX u_raw ON raw (expId, detector, visit);"
                 )
-                log.info(f"Added 'u_raw' index to raw table of {registry_filename}")
+
+        for column in missing_columns:
+            log.info(f"Added '{column}' column to raw table of {registry_filename}")
+        if not has_uraw_index:
+            log.info(f"Added 'u_raw' index to raw table of {registry_filename}")
 
 
 def update_calib_registry(calib_root):
@@ -133,26 +227,32 @@ def update_calib_registry(calib_root):
         "sky",
         "sky_visit",
     )
-    old_filter_names = ("u", "g", "r", "i", "z", "y")
+    old_filter_names = tuple(NEW_FILTER_NAMES)
 
     calib_registry_filename = os.path.join(calib_root, "calibRegistry.sqlite3")
     _break_hardlink(calib_registry_filename)
 
+    # Update every filter in a table with a single statement,
+    # binding the filter names rather than formatting them in.
+    filter_cases = " ".join("WHEN ? THEN ?" for f in old_filter_names)
+    filter_list = ", ".join("?" for f in old_filter_names)
+    filter_params = [
+        name for names in NEW_FILTER_NAMES.items() for name in names
+    ] + list(old_filter_names)
+
     with closing(sqlite3.connect(calib_registry_filename)) as con:
-        for table in tables_to_update:
-            for old_filter_name in old_filter_names:
-                new_filter_name = _transform_filter_name(old_filter_name)
-                query = f"UPDATE {table} SET filter='{new_filter_name}' WHERE filter='{old_filter_name}';"
+        with _bulk_transaction(con):
+            for table in tables_to_update:
+                query = (
+                    f"UPDATE {table} SET filter = CASE filter {filter_cases} END"
+                    + f" WHERE filter IN ({filter_list});"
+                )
                 log.debug(f"Executing query on {calib_registry_filename}: {query}")
-                with con:
-                    con.execute(query)
-                    # Split the message into several lines, which
-                    # makes the code worse but the linter happy.
-                    log.info(
-                        f"Changed old filter name '{old_filter_name}'"
-                        + f" in table {table} of {calib_registry_filename}"
-                        + f" to '{new_filter_name}'"
-                    )
+                con.execute(query, filter_params)
+                log.info(
+                    f"Changed old filter names {old_filter_names}"
+                    + f" in table {table} of {calib_registry_filename}"
+                )
 
 
 def replace_root(filename, old_root, new_root):
@@ -174,16 +274,26 @@ def replace_root(filename, old_root, new_root):
     # and emitter for RepositoryCfg_v1, which would only
     # make it more fragile.
 
-    with open(filename, "r") as f:
-        config_str = f.read()
+    if old_root == new_root:
+        log.info(f"No change in {filename}")
+        return
 
-    new_config_str = config_str.replace(old_root, new_root)
-    if new_config_str == config_str:
+    old_bytes = old_root.encode()
+    new_config = None
+    with open(filename, "rb") as f:
+        # An empty file cannot be mapped, but has nothing to replace anyway.
+        if os.fstat(f.fileno()).st_size > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as config_map:
+                # Only copy the contents if the old root is there at all.
+                if config_map.find(old_bytes) >= 0:
+                    new_config = config_map[:].replace(old_bytes, new_root.encode())
+
+    if new_config is None:
         log.info(f"No change in {filename}")
     else:
         _break_hardlink(filename)
-        with open(filename, "w") as f:
-            f.write(new_config_str)
+        with open(filename, "wb") as f:
+            f.write(new_config)
         log.info(f"{filename} updated")
 
 
@@ -210,7 +320,8 @@ def _break_hardlink(filename):
         shutil.move(filename, temp_file)
 
         try:
-            shutil.copy(temp_file, filename)
+            _fast_copy(temp_file, filename)
+            shutil.copymode(temp_file, filename)
             assert (
                 os.stat(filename).st_nlink == 1
             ), f"Failed to break hardlink on {filename}"
@@ -221,13 +332,256 @@ def _break_hardlink(filename):
             # all exceptions.
         except BaseException as error:
             # If for any reason we could not make the
-            # new copy, try to put the old one back before
-            # cleaning up the temp directory
-            if not os.path.isfile(filename):
-                shutil.move(temp_file, filename)
+            # new copy, put the old one back, in place of
+            # any partial copy, before cleaning up the
+            # temp directory
+            if os.path.lexists(filename):
+                os.unlink(filename)
+            shutil.move(temp_file, filename)
             raise error
 
 
+def _fast_copy(src, dst):
+    """Copy the contents of a file without passing them through python
+
+    Try a copy-on-write clone first (``clonefile`` on macOS,
+    ``FICLONE`` on linux), then in-kernel copies with
+    ``copy_file_range`` and ``sendfile``. If none is supported by
+    the filesystem, fall back on `shutil.copyfile` on macOS (which
+    uses ``fcopyfile``) and on a buffered copy elsewhere.
+
+    Parameters
+    ----------
+    src : `str`
+        the path of the file to copy
+    dst : `str`
+        the path of the new copy
+    """
+    # clonefile makes the destination itself, so try it before
+    # opening one; it fails if the destination already exists.
+    if CLONEFILE is not None:
+        if CLONEFILE(os.fsencode(src), os.fsencode(dst), 0) == 0:
+            return
+
+    with open(src, "rb", buffering=0) as fsrc, open(dst, "wb", buffering=0) as fdst:
+        src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+
+        if FICLONE is not None:
+            try:
+                fcntl.ioctl(dst_fd, FICLONE, src_fd)
+                return
+            except OSError:
+                pass
+
+        # Both kernel copies start from the current file offsets and
+        # advance them, so each can pick up where the last one gave up.
+        src_size = os.fstat(src_fd).st_size
+        remaining = src_size
+        for kernel_copy in _kernel_copies():
+            if remaining == 0:
+                break
+            try:
+                while remaining > 0:
+                    copied = kernel_copy(src_fd, dst_fd, remaining)
+                    # Some filesystems report copying nothing rather than
+                    # an error when they cannot copy, so try the next way.
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            except OSError as error:
+                if error.errno not in UNSUPPORTED_COPY_ERRNOS:
+                    raise
+
+        if remaining > 0:
+            if sys.platform == "darwin":
+                shutil.copyfile(src, dst)
+            else:
+                _buffered_copy(src_fd, dst_fd)
+
+        # Callers replace or delete the source after copying it,
+        # so a short copy must never pass for a complete one.
+        dst_size = os.fstat(dst_fd).st_size
+        if dst_size != src_size:
+            raise OSError(
+                errno.EIO,
+                f"Copied only {dst_size} of {src_size} bytes of {src} to {dst}",
+            )
+
+
+def _buffered_copy(src_fd, dst_fd):
+    """Copy the rest of a file through a large buffer
+
+    `shutil.copyfileobj` reads in chunks of only 64kB or so on linux,
+    which takes many system calls for a large FITS file.
+
+    Parameters
+    ----------
+    src_fd : `int`
+        file descriptor from whose offset to read
+    dst_fd : `int`
+        file descriptor to which to write
+    """
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(src_fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+    buffer = bytearray(COPY_BUFFER_SIZE)
+    view = memoryview(buffer)
+    while True:
+        size = os.readv(src_fd, [buffer])
+        if size == 0:
+            break
+        written = 0
+        while written < size:
+            written += os.write(dst_fd, view[written:size])
+
+
+def _kernel_copies():
+    """List the in-kernel file copy functions available on this platform
+
+    Returns
+    -------
+    kernel_copies : `list`
+        functions taking source and destination file descriptors and
+        a maximum number of bytes to copy, and returning the number
+        copied, in order of preference
+    """
+    kernel_copies = []
+    if hasattr(os, "copy_file_range"):
+        kernel_copies.append(os.copy_file_range)
+    # Elsewhere, sendfile can only write to sockets.
+    if sys.platform.startswith("linux") and hasattr(os, "sendfile"):
+        kernel_copies.append(
+            lambda src_fd, dst_fd, count: os.sendfile(dst_fd, src_fd, None, count)
+        )
+    return kernel_copies
+
+
+@functools.lru_cache(maxsize=8)
+def _get_policy(policy_file):
+    """Load a policy, reusing it if it has already been loaded
+
+    Parameters
+    ----------
+    policy_file : `str` or `None`
+        Policy file from which to load templates, or None
+        for the lsstCam mapper policy from obs_lsst
+
+    Returns
+    -------
+    policy : `lsst.daf.persistence.Policy`
+        the policy, shared between callers; do not modify it
+    """
+    # Importing the gen2 butler is slow, so wait until a policy is needed.
+    from lsst.daf.persistence import Policy
+
+    if policy_file is None:
+        policy_file = Policy.defaultPolicyFile(*DEFAULT_POLICY)
+    return Policy(policy_file)
+
+
+@functools.lru_cache(maxsize=8)
+def _get_templates(policy_file):
+    """Get the file name templates of the data types to convert
+
+    Parameters
+    ----------
+    policy_file : `str` or `None`
+        Policy file from which to load templates, or None
+        for the lsstCam mapper policy from obs_lsst
+
+    Returns
+    -------
+    templates : `dict`
+        the file name template of each data type in
+        ``DATATYPES_TO_CONVERT``, shared between callers
+    """
+    calibrations = _get_policy(policy_file)["calibrations"]
+    templates = {}
+    for data_type in DATATYPES_TO_CONVERT:
+        if data_type == "SKY":
+            template = calibrations["sky"]["template"]
+            template = template.replace("sky", "SKY")
+        else:
+            template = calibrations[data_type]["template"]
+        templates[data_type] = template
+
+    return templates
+
+
+@contextmanager
+def _bulk_transaction(con):
+    """Make all updates to a gen2 registry in one immediate transaction
+
+    This is meant for the one-time migration of a registry: it takes
+    the write lock up front, syncs to disk less often, and commits
+    only once, at the end.
+
+    Parameters
+    ----------
+    con : `sqlite3.Connection`
+        the connection to the registry
+
+    Yields
+    ------
+    con : `sqlite3.Connection`
+        the same connection, with a transaction open
+    """
+    # Manage the transaction explicitly, so that the sqlite3
+    # module does not commit before schema changes.
+    con.isolation_level = None
+    con.execute("PRAGMA synchronous=NORMAL;")
+    con.execute("BEGIN IMMEDIATE;")
+    try:
+        yield con
+    except BaseException:
+        con.execute("ROLLBACK;")
+        raise
+    con.execute("COMMIT;")
+
+
+def _move_batch(new_dir, pairs):
+    """Move a batch of files into one directory
+
+    Parameters
+    ----------
+    new_dir : `str`
+        the directory into which the files are moved,
+        created if it does not already exist
+    pairs : `list` of `tuple` of `str`
+        the current and new path of each file to move
+    """
+    os.makedirs(new_dir, exist_ok=True)
+    for old_filename, new_filename in pairs:
+        _move_file(old_filename, new_filename)
+
+
+def _move_file(old_filename, new_filename):
+    """Move a file, with a single rename when possible
+
+    Parameters
+    ----------
+    old_filename : `str`
+        the current path of the file
+    new_filename : `str`
+        the path to which to move the file
+    """
+    # Source and destination are normally in the same calib
+    # root, so a rename will work; only fall back on
+    # copying if they are on different devices.
+    try:
+        os.replace(old_filename, new_filename)
+    except OSError as error:
+        if error.errno != errno.EXDEV:
+            raise
+
+        # Otherwise, do what shutil.move would, but with a faster copy;
+        # it raises rather than leave a short copy, so the source is
+        # deleted only once the new file is complete.
+        _fast_copy(old_filename, new_filename)
+        shutil.copystat(old_filename, new_filename)
+        os.unlink(old_filename)
+
+
 def _transform_filter_name(old_filter_name):
     """Create the new filter name from the old one
 
@@ -242,19 +596,24 @@ def _transform_filter_name(old_filter_name):
         the new filter name
 
     """
-    new_filter_name = old_filter_name + "_sim_1.4"
+    new_filter_name = NEW_FILTER_NAMES.get(old_filter_name)
+    if new_filter_name is None:
+        new_filter_name = old_filter_name + FILTER_SUFFIX
     return new_filter_name
 
 
-def _transform_pairs(calib_root, template):
+def _transform_pairs(calib_root, *templates, jobs=DEFAULT_JOBS):
     """Generate tuples of old and new file names
 
     Parameters
     ----------
     calib_root : str
         Root directory for the gen2 POSIX datastore
-    template : str
-        File name template
+    *templates : str
+        File name templates; the datastore is walked
+        only once, however many are given
+    jobs : int
+        number of threads with which to read directories
 
     Yields
     ------
@@ -263,44 +622,299 @@ def _transform_pairs(calib_root, template):
     new_file_path : `str`
         the path of the file in the old POSIX datastore
     """
-    dir_template, file_template = os.path.split(template)
-    full_dir_template = os.path.join(calib_root, dir_template)
-    dir_keys = {"filter": str, "calibDate": str}
-    dir_parser = PathElementParser(full_dir_template, dir_keys)
-    file_keys = {
-        "filter": str,
-        "raftName": str,
-        "detectorName": str,
-        "calibDate": str,
-        "detector": int,
-    }
-    file_parser = PathElementParser(file_template, file_keys)
-    for old_root, old_dirs, old_files in os.walk(calib_root):
-        # Extract the metadata in the path
-        dir_elements = {}
-        dir_elements = dir_parser.parse(old_root, dir_elements)
-
-        # Ignore directories that do not fit the template
-        if not dir_elements:
-            continue
-
-        # Update the metadata for the path
-        dir_elements["filter"] = _transform_filter_name(dir_elements["filter"])
-        new_path = dir_template % dir_elements
-
-        # Process the files
-        for old_file in old_files:
-            file_elements = {}
-            file_elements = file_parser.parse(old_file, file_elements)
-
-            # Ignore files that do not fit the template
-            if not file_elements:
+    template_specs = []
+    for template in templates:
+        dir_template, file_template = os.path.split(template)
+        full_dir_template = os.path.join(calib_root, dir_template)
+        template_specs.append(
+            (
+                dir_template,
+                _template_to_format(dir_template),
+                _template_to_format(file_template),
+                _template_to_regex(full_dir_template),
+                _template_to_regex(file_template),
+            )
+        )
+
+    # Tests for each element of each directory template, so that
+    # subdirectories that cannot match are never visited. Elements
+    # without substitutions, like "flat", need only a comparison.
+    dir_element_tests = [
+        [_element_test(element) for element in spec[0].split(os.sep)]
+        for spec in template_specs
+    ]
+
+    for old_root, template_indexes, file_entries in _scan(
+        calib_root, dir_element_tests, jobs
+    ):
+        for template_index in template_indexes:
+            dir_template, dir_format, file_format, dir_re, file_re = template_specs[
+                template_index
+            ]
+
+            # Extract the metadata in the path
+            dir_match = dir_re.fullmatch(old_root)
+
+            # Ignore directories that do not fit the template
+            if dir_match is None:
                 continue
-            file_elements["filter"] = _transform_filter_name(file_elements["filter"])
-            new_file = file_template % file_elements
-            old_full_path = os.path.join(old_root, old_file)
-            new_full_path = os.path.join(calib_root, new_path, new_file)
-            yield (old_full_path, new_full_path)
+
+            # Update the metadata for the path
+            dir_elements = _match_elements(dir_match)
+            dir_elements["filter"] = _transform_filter_name(dir_elements["filter"])
+            new_path = dir_format.format_map(dir_elements)
+
+            # Join the directory once, rather than once per file
+            new_dir_prefix = os.path.join(calib_root, new_path) + os.sep
+
+            # Process the files
+            for file_entry in file_entries:
+                file_match = file_re.fullmatch(file_entry.name)
+
+                # Ignore files that do not fit the template
+                if file_match is None:
+                    continue
+                file_elements = _match_elements(file_match)
+                file_elements["filter"] = _transform_filter_name(
+                    file_elements["filter"]
+                )
+                new_file = file_format.format_map(file_elements)
+                new_full_path = new_dir_prefix + new_file
+                yield (file_entry.path, new_full_path)
+
+
+def _element_test(element):
+    """Make a test of whether a directory name fits a template element
+
+    Parameters
+    ----------
+    element : `str`
+        One element of a directory template
+
+    Returns
+    -------
+    test : callable
+        Takes a directory name and returns whether it fits
+    """
+    if TEMPLATE_FIELD_RE.search(element) is None:
+        return element.__eq__
+    return _template_to_regex(element).fullmatch
+
+
+def _scan(root, dir_element_tests, jobs=DEFAULT_JOBS):
+    """Find files in directories whose path elements match templates
+
+    Each directory is read at most once, however many of the
+    templates it could match. The directories at each level are read
+    concurrently, to hide the latency of network filesystems.
+
+    Parameters
+    ----------
+    root : `str`
+        Directory in which to start the search
+    dir_element_tests : `list` of `list` of callable
+        For each template, tests the names of successive
+        levels of subdirectories below ``root`` must pass
+    jobs : `int`
+        number of threads with which to read directories
+
+    Yields
+    ------
+    dir_path : `str`
+        the path of a directory
+    template_indexes : `list` of `int`
+        the templates all of whose expressions the path matches
+    file_entries : `list` of `os.DirEntry`
+        the entries of the files (anything but directories) in it
+    """
+    level = [(root, list(range(len(dir_element_tests))))]
+    depth = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        while level:
+            next_level = []
+            listings = executor.map(_list_dir, [dir_path for dir_path, _ in level])
+            for (dir_path, template_indexes), entries in zip(level, listings):
+                # Like os.walk, skip directories that cannot be read.
+                if entries is None:
+                    continue
+
+                complete = [
+                    i for i in template_indexes if len(dir_element_tests[i]) == depth
+                ]
+                if complete:
+                    yield (dir_path, complete, [e for e in entries if not e.is_dir()])
+
+                deeper = [
+                    i for i in template_indexes if len(dir_element_tests[i]) > depth
+                ]
+                if not deeper:
+                    continue
+
+                # As os.walk does by default, do not descend through symlinks;
+                # that also lets DirEntry answer without another stat.
+                for entry in entries:
+                    if not entry.is_dir(follow_symlinks=False):
+                        continue
+                    matching = [
+                        i
+                        for i in deeper
+                        if dir_element_tests[i][depth](entry.name)
+                    ]
+                    if matching:
+                        next_level.append((entry.path, matching))
+
+            level = next_level
+            depth += 1
+
+
+def _list_dir(dir_path):
+    """Read all the entries in a directory
+
+    The whole directory is read before returning, because
+    callers may move files out of it while using the entries.
+
+    Parameters
+    ----------
+    dir_path : `str`
+        the path of the directory
+
+    Returns
+    -------
+    entries : `list` of `os.DirEntry` or `None`
+        the entries in the directory, or `None` if it cannot be read
+    """
+    try:
+        with os.scandir(dir_path) as entries:
+            return list(entries)
+    except OSError:
+        return None
+
+
+@functools.lru_cache(maxsize=64)
+def _template_to_regex(template):
+    """Compile a regular expression that matches paths made from a template
+
+    The expressions are cached, because the same templates are
+    used for every calib repo and data type.
+
+    Parameters
+    ----------
+    template : `str`
+        Path template with ``%(key)s``-style substitutions
+        of the keys in ``TEMPLATE_KEYS``
+
+    Returns
+    -------
+    template_re : `re.Pattern`
+        Compiled expression with a named group for each key in the template
+    """
+    regex = ""
+    matched_keys = set()
+    literal_start = 0
+    for field_match in TEMPLATE_FIELD_RE.finditer(template):
+        regex += re.escape(template[literal_start:field_match.start()])
+        key = field_match.group(1)
+        if key in matched_keys:
+            # Repeated keys must take the same value every time
+            regex += f"(?P={key})"
+        else:
+            value_regex = r"\d+" if TEMPLATE_KEYS[key] is int else r"[^/]+?"
+            regex += f"(?P<{key}>{value_regex})"
+            matched_keys.add(key)
+        literal_start = field_match.end()
+    regex += re.escape(template[literal_start:])
+    return re.compile(regex)
+
+
+@functools.lru_cache(maxsize=64)
+def _template_to_format(template):
+    """Convert a ``%``-style path template to a `str.format` one
+
+    Formatting with `str.format_map` is faster than with ``%``, and
+    the converted templates are cached, so this is done only once.
+
+    Parameters
+    ----------
+    template : `str`
+        Path template with ``%(key)s``-style substitutions
+        of the keys in ``TEMPLATE_KEYS``
+
+    Returns
+    -------
+    format_template : `str`
+        Equivalent template with ``{key}``-style substitutions
+    """
+    format_template = ""
+    literal_start = 0
+    for field_match in TEMPLATE_FIELD_RE.finditer(template):
+        literal = template[literal_start:field_match.start()]
+        format_template += literal.replace("{", "{{").replace("}", "}}")
+        key, flags, width, conversion = field_match.groups()
+        if conversion not in "sdi":
+            raise ValueError(f"Unsupported conversion %{conversion} in {template}")
+        # % ignores flags other than "-" for strings,
+        # but str.format would either use them or fail.
+        if conversion == "s" and flags.strip("-"):
+            raise ValueError(f"Unsupported flags {flags} for %s in {template}")
+
+        # Unlike str.format, % right-aligns strings unless told otherwise.
+        if "-" in flags:
+            spec = "<"
+        elif conversion == "s" and width:
+            spec = ">"
+        else:
+            spec = ""
+        # "+" overrides " ", and "#" has no effect on integers.
+        if "+" in flags:
+            spec += "+"
+        elif " " in flags:
+            spec += " "
+        if "0" in flags and "-" not in flags:
+            spec += "0"
+        spec += width
+        if conversion != "s":
+            spec += "d"
+
+        format_template += f"{{{key}:{spec}}}" if spec else f"{{{key}}}"
+        literal_start = field_match.end()
+    literal = template[literal_start:]
+    format_template += literal.replace("{", "{{").replace("}", "}}")
+    return format_template
+
+
+def _match_elements(template_match):
+    """Extract typed metadata from a match of a template regular expression
+
+    Parameters
+    ----------
+    template_match : `re.Match`
+        Match of an expression made by `_template_to_regex`
+
+    Returns
+    -------
+    elements : `dict`
+        Values of the keys in the template
+    """
+    return {k: TEMPLATE_KEYS[k](v) for k, v in template_match.groupdict().items()}
+
+
+def _positive_int(value):
+    """Parse a command line argument that must be a positive integer
+
+    Parameters
+    ----------
+    value : `str`
+        the argument
+
+    Returns
+    -------
+    number : `int`
+        the parsed argument
+    """
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {number}")
+    return number
 
 
 def _main(args=None):
@@ -319,6 +933,19 @@ def _main(args=None):
         const=lsst.log.Log.DEBUG,
         help="Set the log level to DEBUG.",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=_positive_int,
+        default=DEFAULT_JOBS,
+        help="Number of threads with which to find and move files.",
+    )
+    parser.add_argument(
+        "-n",
+        "--dry-run",
+        action="store_true",
+        help="Only log the files that would be moved, changing nothing.",
+    )
 
     commandline_options = parser.parse_args(args)
 
@@ -335,7 +962,7 @@ log4j.appender.A1.layout.ConversionPattern=%-5p %d{yyyy-MM-ddTHH:mm:ss.SSSZ} %c
     log.setLevel(commandline_options.verbose)
 
     with open(commandline_options.option_filename, "r") as options_file:
-        options = yaml.safe_load(options_file)
+        options = yaml.load(options_file, Loader=YAML_LOADER)
 
     origin_root = options["origin_root"]
     gen2_root = options["gen2_root"]
@@ -343,13 +970,19 @@ log4j.appender.A1.layout.ConversionPattern=%-5p %d{yyyy-MM-ddTHH:mm:ss.SSSZ} %c
     calib_paths = [os.path.join(gen2_root, c["path"]) for c in options["calibs"]]
     repository_paths = rerun_paths + calib_paths
 
+    if commandline_options.dry_run:
+        for calib_root in calib_paths:
+            move_files(calib_root, jobs=commandline_options.jobs, dry_run=True)
+        log.info("Dry run: leaving repository configs and registries unchanged")
+        return 0
+
     for repository_path in repository_paths:
         filename = os.path.join(repository_path, "repositoryCfg.yaml")
         replace_root(filename, origin_root, gen2_root)
 
     calib_root = os.path.join(gen2_root, "CALIB")
     for calib_root in calib_paths:
-        move_files(calib_root)
+        move_files(calib_root, jobs=commandline_options.jobs)
         update_calib_registry(calib_root)
 
     update_registry(gen2_root)
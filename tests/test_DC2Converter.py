@@ -3,6 +3,10 @@ import unittest
 from unittest.mock import patch, MagicMock
 from tempfile import TemporaryDirectory
 
+import yaml
+import psycopg2
+from psycopg2 import sql
+
 import lsst.log
 import lsst.obs.base
 import lsst.obs.base.gen2to3
@@ -16,6 +20,7 @@ from lsst.dc2gen3 import DC2Converter
 # directory to be a sibling of the python dir, not a descendent
 TEST_WORKING_DIR = os.path.join(os.path.dirname(__file__), 'config')
 TEST_CONFIG_FILE = 'convert_options.yaml'
+EXAMPLE_CONFIG_DIR = os.path.join(os.path.dirname(__file__), os.pardir, 'config')
 
 
 class DC2ConverterTests(unittest.TestCase):
@@ -137,13 +142,48 @@ class DC2ConverterTests(unittest.TestCase):
         registry_namespace = converter.registry_namespace
         self.assertIsInstance(registry_namespace, str)
 
+    def test_seed_config_cached(self):
+        converter = DC2Converter.load(TEST_CONFIG_FILE)
+        with patch('lsst.dc2gen3.dc2gen3.open', wraps=open, create=True) as mock_open:
+            converter.registry_connection_uri
+            converter.registry_namespace
+            mock_open.assert_called_once()
+
+    def test_seed_is_safe_yaml(self):
+        # The seed files must not need python-specific tags,
+        # because they are read with a safe loader.
+        for seed_dir in (TEST_WORKING_DIR, EXAMPLE_CONFIG_DIR):
+            with open(os.path.join(seed_dir, 'butler_seed.yaml')) as file_handle:
+                seed_config = yaml.load(file_handle, Loader=dc2gen3.YAML_LOADER)
+            self.assertIsInstance(seed_config['registry']['db'], str)
+            self.assertIsInstance(seed_config['registry']['namespace'], str)
+
     @patch('builtins.input', lambda *args: 'y')
     @patch('psycopg2.connect', spec=True)
     def test_empty_registry(self, *mocks):
         connection_uri = 'postgresql:///bogus?host=example.org&port=0&user=nobody'
         test_namespace = 'bogusnamespace'
+        tables = ['dataset', 'visit']
+        seqs = ['dataset_seq']
+        conn = psycopg2.connect.return_value.__enter__.return_value
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.fetchall.side_effect = [[(t,) for t in tables], [(s,) for s in seqs]]
         dc2gen3._empty_registry(connection_uri, test_namespace)
 
+        drops = [c.args[0] for c in cursor.execute.call_args_list
+                 if isinstance(c.args[0], sql.Composed)]
+        self.assertEqual(drops, [
+            dc2gen3._drop_statement('TABLE', test_namespace, tables),
+            dc2gen3._drop_statement('SEQUENCE', test_namespace, seqs)])
+
+    def test_drop_statement(self):
+        statement = dc2gen3._drop_statement('TABLE', 'bogusnamespace', ['dataset', 'visit'])
+        identifiers = [part for part in statement.seq[3].seq
+                       if isinstance(part, sql.Identifier)]
+        self.assertEqual(statement.seq[1], sql.SQL('TABLE'))
+        self.assertEqual(identifiers, [sql.Identifier('bogusnamespace', 'dataset'),
+                                       sql.Identifier('bogusnamespace', 'visit')])
+
     @patch('builtins.input', lambda *args: 'y')
     @patch('lsst.dc2gen3.dc2gen3.shutil.rmtree', spec=True)
     def test_delete_data(self, *mocks):
@@ -1,113 +1,76 @@
+import errno
 import os
+import sqlite3
+import subprocess
+import sys
 import unittest
+from contextlib import closing
 from unittest.mock import patch
+from tempfile import TemporaryDirectory
 
 from lsst.dc2gen3 import patch_dc2
 
-TEST_CALIB_OLD_ROOT = "/tmp/test_patch_dc2_old_calib_root"
-TEST_CALIB_NEW_ROOT = "/tmp/test_patch_dc2_new_calib_root"
-
-# Test data with which to patch os.walk,
-# so we don't need to walk a real filesystem
-TEST1_OS_WALK = [
-    (TEST_CALIB_OLD_ROOT + "/bias", ["2022-01-01"], []),
-    (
-        TEST_CALIB_OLD_ROOT + "/bias/2022-01-01",
-        [],
-        [
-            "bias-R11-S00-det036_2022-01-01.fits",
-            "bias-R01-S00-det000_2022-01-01.fits",
-            "bias-R10-S22-det035_2022-01-01.fits",
-            "bias-R01-S01-det001_2022-01-01.fits",
-            "bias-R11-S01-det037_2022-01-01.fits",
-        ],
-    ),
-    (TEST_CALIB_OLD_ROOT + "/flat/g", ["2022-08-06"], []),
-    (
-        TEST_CALIB_OLD_ROOT + "/flat/g/2022-08-06",
-        [],
-        [
-            "flat_g-R10-S10-det030_2022-08-06.fits",
-            "flat_g-R01-S00-det000_2022-08-06.fits",
-            "flat_g-R10-S11-det031_2022-08-06.fits",
-            "flat_g-R01-S01-det001_2022-08-06.fits",
-            "flat_g-R10-S12-det032_2022-08-06.fits",
-        ],
-    ),
-    (TEST_CALIB_OLD_ROOT + "/flat/y", ["2022-08-06"], []),
-    (
-        TEST_CALIB_OLD_ROOT + "/flat/y/2022-08-06",
-        [],
-        [
-            "flat_y-R10-S10-det030_2022-08-06.fits",
-            "flat_y-R01-S00-det000_2022-08-06.fits",
-            "flat_y-R10-S11-det031_2022-08-06.fits",
-            "flat_y-R01-S01-det001_2022-08-06.fits",
-            "flat_y-R10-S12-det032_2022-08-06.fits",
-        ],
-    ),
-]
+# Files with which to populate a test calib root,
+# relative to the root itself.
+TEST1_CALIB_FILES = (
+    "bias/2022-01-01/bias-R11-S00-det036_2022-01-01.fits",
+    "bias/2022-01-01/bias-R01-S00-det000_2022-01-01.fits",
+    "bias/2022-01-01/bias-R10-S22-det035_2022-01-01.fits",
+    "bias/2022-01-01/bias-R01-S01-det001_2022-01-01.fits",
+    "bias/2022-01-01/bias-R11-S01-det037_2022-01-01.fits",
+    "flat/g/2022-08-06/flat_g-R10-S10-det030_2022-08-06.fits",
+    "flat/g/2022-08-06/flat_g-R01-S00-det000_2022-08-06.fits",
+    "flat/g/2022-08-06/flat_g-R10-S11-det031_2022-08-06.fits",
+    "flat/g/2022-08-06/flat_g-R01-S01-det001_2022-08-06.fits",
+    "flat/g/2022-08-06/flat_g-R10-S12-det032_2022-08-06.fits",
+    "flat/y/2022-08-06/flat_y-R10-S10-det030_2022-08-06.fits",
+    "flat/y/2022-08-06/flat_y-R01-S00-det000_2022-08-06.fits",
+    "flat/y/2022-08-06/flat_y-R10-S11-det031_2022-08-06.fits",
+    "flat/y/2022-08-06/flat_y-R01-S01-det001_2022-08-06.fits",
+    "flat/y/2022-08-06/flat_y-R10-S12-det032_2022-08-06.fits",
+    "sky/r/2022-08-06/sky_r-R10-S10-det030_2022-08-06.fits",
+)
 
 TEST1_TRANSFORM_PAIRS = (
     (
-        TEST_CALIB_OLD_ROOT
-        + "/flat/g/2022-08-06/flat_g-R10-S10-det030_2022-08-06.fits",
-        TEST_CALIB_NEW_ROOT
-        + "/flat/g_sim_1.4/2022-08-06/flat_g_sim_1.4-R10-S10-det030_2022-08-06.fits",
+        "flat/g/2022-08-06/flat_g-R01-S00-det000_2022-08-06.fits",
+        "flat/g_sim_1.4/2022-08-06/flat_g_sim_1.4-R01-S00-det000_2022-08-06.fits",
     ),
     (
-        TEST_CALIB_OLD_ROOT
-        + "/flat/g/2022-08-06/flat_g-R01-S00-det000_2022-08-06.fits",
-        TEST_CALIB_NEW_ROOT
-        + "/flat/g_sim_1.4/2022-08-06/flat_g_sim_1.4-R01-S00-det000_2022-08-06.fits",
+        "flat/g/2022-08-06/flat_g-R01-S01-det001_2022-08-06.fits",
+        "flat/g_sim_1.4/2022-08-06/flat_g_sim_1.4-R01-S01-det001_2022-08-06.fits",
     ),
     (
-        TEST_CALIB_OLD_ROOT
-        + "/flat/g/2022-08-06/flat_g-R10-S11-det031_2022-08-06.fits",
-        TEST_CALIB_NEW_ROOT
-        + "/flat/g_sim_1.4/2022-08-06/flat_g_sim_1.4-R10-S11-det031_2022-08-06.fits",
+        "flat/g/2022-08-06/flat_g-R10-S10-det030_2022-08-06.fits",
+        "flat/g_sim_1.4/2022-08-06/flat_g_sim_1.4-R10-S10-det030_2022-08-06.fits",
     ),
     (
-        TEST_CALIB_OLD_ROOT
-        + "/flat/g/2022-08-06/flat_g-R01-S01-det001_2022-08-06.fits",
-        TEST_CALIB_NEW_ROOT
-        + "/flat/g_sim_1.4/2022-08-06/flat_g_sim_1.4-R01-S01-det001_2022-08-06.fits",
+        "flat/g/2022-08-06/flat_g-R10-S11-det031_2022-08-06.fits",
+        "flat/g_sim_1.4/2022-08-06/flat_g_sim_1.4-R10-S11-det031_2022-08-06.fits",
     ),
     (
-        TEST_CALIB_OLD_ROOT
-        + "/flat/g/2022-08-06/flat_g-R10-S12-det032_2022-08-06.fits",
-        TEST_CALIB_NEW_ROOT
-        + "/flat/g_sim_1.4/2022-08-06/flat_g_sim_1.4-R10-S12-det032_2022-08-06.fits",
+        "flat/g/2022-08-06/flat_g-R10-S12-det032_2022-08-06.fits",
+        "flat/g_sim_1.4/2022-08-06/flat_g_sim_1.4-R10-S12-det032_2022-08-06.fits",
     ),
     (
-        TEST_CALIB_OLD_ROOT
-        + "/flat/y/2022-08-06/flat_y-R10-S10-det030_2022-08-06.fits",
-        TEST_CALIB_NEW_ROOT
-        + "/flat/y_sim_1.4/2022-08-06/flat_y_sim_1.4-R10-S10-det030_2022-08-06.fits",
+        "flat/y/2022-08-06/flat_y-R01-S00-det000_2022-08-06.fits",
+        "flat/y_sim_1.4/2022-08-06/flat_y_sim_1.4-R01-S00-det000_2022-08-06.fits",
     ),
     (
-        TEST_CALIB_OLD_ROOT
-        + "/flat/y/2022-08-06/flat_y-R01-S00-det000_2022-08-06.fits",
-        TEST_CALIB_NEW_ROOT
-        + "/flat/y_sim_1.4/2022-08-06/flat_y_sim_1.4-R01-S00-det000_2022-08-06.fits",
+        "flat/y/2022-08-06/flat_y-R01-S01-det001_2022-08-06.fits",
+        "flat/y_sim_1.4/2022-08-06/flat_y_sim_1.4-R01-S01-det001_2022-08-06.fits",
     ),
     (
-        TEST_CALIB_OLD_ROOT
-        + "/flat/y/2022-08-06/flat_y-R10-S11-det031_2022-08-06.fits",
-        TEST_CALIB_NEW_ROOT
-        + "/flat/y_sim_1.4/2022-08-06/flat_y_sim_1.4-R10-S11-det031_2022-08-06.fits",
+        "flat/y/2022-08-06/flat_y-R10-S10-det030_2022-08-06.fits",
+        "flat/y_sim_1.4/2022-08-06/flat_y_sim_1.4-R10-S10-det030_2022-08-06.fits",
     ),
     (
-        TEST_CALIB_OLD_ROOT
-        + "/flat/y/2022-08-06/flat_y-R01-S01-det001_2022-08-06.fits",
-        TEST_CALIB_NEW_ROOT
-        + "/flat/y_sim_1.4/2022-08-06/flat_y_sim_1.4-R01-S01-det001_2022-08-06.fits",
+        "flat/y/2022-08-06/flat_y-R10-S11-det031_2022-08-06.fits",
+        "flat/y_sim_1.4/2022-08-06/flat_y_sim_1.4-R10-S11-det031_2022-08-06.fits",
     ),
     (
-        TEST_CALIB_OLD_ROOT
-        + "/flat/y/2022-08-06/flat_y-R10-S12-det032_2022-08-06.fits",
-        TEST_CALIB_NEW_ROOT
-        + "/flat/y_sim_1.4/2022-08-06/flat_y_sim_1.4-R10-S12-det032_2022-08-06.fits",
+        "flat/y/2022-08-06/flat_y-R10-S12-det032_2022-08-06.fits",
+        "flat/y_sim_1.4/2022-08-06/flat_y_sim_1.4-R10-S12-det032_2022-08-06.fits",
     ),
 )
 
@@ -122,39 +85,317 @@ TEST_TEMPLATE = os.path.join(
 )
 
 
-@patch("os.walk", return_value=TEST1_OS_WALK, spec=True)
-@patch("shutil.copyfile", spec=True)
+TEST_SKY_TEMPLATE = TEST_TEMPLATE.replace("flat", "sky")
+
+TEST_SKY_TRANSFORM_PAIR = (
+    "sky/r/2022-08-06/sky_r-R10-S10-det030_2022-08-06.fits",
+    "sky/r_sim_1.4/2022-08-06/sky_r_sim_1.4-R10-S10-det030_2022-08-06.fits",
+)
+
+
 class PatchDC2Tests(unittest.TestCase):
-    def test_transform_pairs(self, *mocks):
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.calib_root = self.temp_dir.name
+        for calib_file in TEST1_CALIB_FILES:
+            path = os.path.join(self.calib_root, calib_file)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(calib_file)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def full_paths(self, pairs):
+        return tuple(
+            tuple(os.path.join(self.calib_root, p) for p in pair) for pair in pairs
+        )
+
+    def test_import_without_butler(self):
+        # Patching a gen2 repo should need neither the gen2 nor the
+        # gen3 butler until a policy is loaded.
+        butler_modules = ("lsst.daf.persistence", "lsst.daf.butler", "lsst.dc2gen3.dc2gen3")
+        code = (
+            "import sys, lsst.dc2gen3.patch_dc2; "
+            + f"print(*(m for m in {butler_modules!r} if m in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        self.assertEqual(result.stdout.strip(), "")
+
+    def test_transform_pairs(self):
+        transformed_pairs = tuple(
+            sorted(patch_dc2._transform_pairs(self.calib_root, TEST_TEMPLATE))
+        )
+
+        self.assertEqual(transformed_pairs, self.full_paths(TEST1_TRANSFORM_PAIRS))
+
+    def test_transform_pairs_multiple_templates(self):
         transformed_pairs = tuple(
-            patch_dc2._transform_pairs(
-                TEST_CALIB_OLD_ROOT, TEST_CALIB_NEW_ROOT, TEST_TEMPLATE
+            sorted(
+                patch_dc2._transform_pairs(
+                    self.calib_root, TEST_TEMPLATE, TEST_SKY_TEMPLATE
+                )
             )
         )
 
-        self.assertEqual(transformed_pairs, TEST1_TRANSFORM_PAIRS)
+        self.assertEqual(
+            transformed_pairs,
+            self.full_paths(TEST1_TRANSFORM_PAIRS + (TEST_SKY_TRANSFORM_PAIR,)),
+        )
+
+    def test_template_to_format(self):
+        elements = dict(
+            filter="g",
+            raftName="R10",
+            detectorName="S10",
+            detector=30,
+            calibDate="2022-08-06",
+        )
+        for template in (
+            TEST_TEMPLATE,
+            "{%(filter)5s|%(detector)-4d}",
+            "%(detector)+ 3d|%(detector) 04d|%(detector)-05d|%(detector)#i",
+        ):
+            format_template = patch_dc2._template_to_format(template)
+            self.assertEqual(
+                format_template.format_map(elements), template % elements
+            )
+
+        for template in ("%(filter)05s", "%(filter)+s", "%(detector)x"):
+            with self.assertRaises(ValueError):
+                patch_dc2._template_to_format(template)
 
-    def test_transform_filter(self, *mocks):
+    def test_transform_filter(self):
         old_filter = "g"
         new_filter = "g_sim_1.4"
         returned_filter = patch_dc2._transform_filter_name(old_filter)
         self.assertEqual(returned_filter, new_filter)
 
-    def test_copy_files(self, *mocks):
-        patch_dc2.copy_files(TEST_CALIB_OLD_ROOT, TEST_CALIB_NEW_ROOT)
-        mock_calls = mocks[0].mock_calls
-        for mock_call, test_args in zip(mock_calls, TEST1_TRANSFORM_PAIRS):
-            called_args = mock_call[1]
-            self.assertEquals(called_args, test_args)
+    def test_move_files(self):
+        patch_dc2.move_files(self.calib_root)
+        for old_path, new_path in self.full_paths(TEST1_TRANSFORM_PAIRS):
+            self.assertFalse(os.path.exists(old_path))
+            with open(new_path, "r") as f:
+                self.assertEqual(
+                    os.path.join(self.calib_root, f.read()), old_path
+                )
 
-    @patch("lsst.dc2gen3.patch_dc2.copy_files", spec=True)
+    def test_move_files_given_pairs(self):
+        pairs = self.full_paths(TEST1_TRANSFORM_PAIRS[:2])
+        patch_dc2.move_files(self.calib_root, pairs=pairs)
+        for old_path, new_path in self.full_paths(TEST1_TRANSFORM_PAIRS):
+            moved = (old_path, new_path) in pairs
+            self.assertEqual(os.path.exists(old_path), not moved)
+            self.assertEqual(os.path.exists(new_path), moved)
+
+    def test_move_files_no_jobs(self):
+        with self.assertRaises(ValueError):
+            patch_dc2.move_files(self.calib_root, jobs=0)
+
+    def test_move_files_dry_run(self):
+        patch_dc2.move_files(self.calib_root, dry_run=True)
+        for old_path, new_path in self.full_paths(TEST1_TRANSFORM_PAIRS):
+            self.assertTrue(os.path.exists(old_path))
+            self.assertFalse(os.path.exists(new_path))
+
+    @patch("lsst.dc2gen3.patch_dc2.os.replace")
+    def test_move_file_across_devices(self, replace):
+        replace.side_effect = OSError(errno.EXDEV, "Invalid cross-device link")
+        old_path, new_path = self.full_paths(TEST1_TRANSFORM_PAIRS[:1])[0]
+        os.makedirs(os.path.dirname(new_path))
+        patch_dc2._move_file(old_path, new_path)
+        self.assertFalse(os.path.exists(old_path))
+        with open(new_path, "r") as f:
+            self.assertEqual(os.path.join(self.calib_root, f.read()), old_path)
+
+    @unittest.skipIf(sys.platform == "darwin", "macOS falls back on shutil.copyfile")
+    @patch("lsst.dc2gen3.patch_dc2._buffered_copy")
+    @patch("lsst.dc2gen3.patch_dc2._kernel_copies", return_value=[])
+    @patch("lsst.dc2gen3.patch_dc2.CLONEFILE", None)
+    @patch("lsst.dc2gen3.patch_dc2.FICLONE", None)
+    @patch("lsst.dc2gen3.patch_dc2.os.replace")
+    def test_move_file_short_copy(self, replace, kernel_copies, buffered_copy):
+        replace.side_effect = OSError(errno.EXDEV, "Invalid cross-device link")
+        buffered_copy.side_effect = lambda src_fd, dst_fd: os.write(dst_fd, b"x")
+        old_path, new_path = self.full_paths(TEST1_TRANSFORM_PAIRS[:1])[0]
+        os.makedirs(os.path.dirname(new_path))
+        with self.assertRaises(OSError) as raised:
+            patch_dc2._move_file(old_path, new_path)
+        self.assertEqual(raised.exception.errno, errno.EIO)
+        self.assertTrue(os.path.exists(old_path))
+
+    def test_update_calib_registry(self):
+        tables = ("flat", "flat_visit", "fringe", "fringe_visit", "sky", "sky_visit")
+        registry_filename = os.path.join(self.calib_root, "calibRegistry.sqlite3")
+        with closing(sqlite3.connect(registry_filename)) as con:
+            with con:
+                for table in tables:
+                    con.execute(f"CREATE TABLE {table} (id INT, filter TEXT);")
+                    con.executemany(
+                        f"INSERT INTO {table} VALUES (?, ?);",
+                        enumerate(("g", "y", "NONE")),
+                    )
+
+        patch_dc2.update_calib_registry(self.calib_root)
+
+        with closing(sqlite3.connect(registry_filename)) as con:
+            for table in tables:
+                filters = [
+                    r[0] for r in con.execute(f"SELECT filter FROM {table} ORDER BY id;")
+                ]
+                self.assertEqual(filters, ["g_sim_1.4", "y_sim_1.4", "NONE"])
+
+    def test_update_registry(self):
+        registry_filename = os.path.join(self.calib_root, "registry.sqlite3")
+        with closing(sqlite3.connect(registry_filename)) as con:
+            with con:
+                con.execute(
+                    "CREATE TABLE raw (visit INT, detector INT, obsid TEXT);"
+                )
+                con.executemany(
+                    "INSERT INTO raw VALUES (?, ?, ?);",
+                    ((1000, 1, "1000"), (1000, 2, "1000"), (1001, 1, "1001")),
+                )
+
+        patch_dc2.update_registry(self.calib_root)
+
+        with closing(sqlite3.connect(registry_filename)) as con:
+            rows = list(
+                con.execute(
+                    "SELECT controller, obsid, expGroup, expId FROM raw"
+                    + " ORDER BY visit, detector;"
+                )
+            )
+            indexes = [r[1] for r in con.execute("PRAGMA index_list(raw);")]
+        self.assertEqual(
+            rows,
+            [
+                ("S", "1000", "1000", 1000),
+                ("S", "1000", "1000", 1000),
+                ("S", "1001", "1001", 1001),
+            ],
+        )
+        self.assertIn("u_raw", indexes)
+
+    def test_replace_root(self):
+        filename = os.path.join(self.calib_root, "repositoryCfg.yaml")
+        with open(filename, "w") as f:
+            f.write("_root: /old/gen2\n_parents: [/old/gen2/CALIB]\n")
+        patch_dc2.replace_root(filename, "/old/gen2", "/new/gen2")
+        with open(filename, "r") as f:
+            self.assertEqual(
+                f.read(), "_root: /new/gen2\n_parents: [/new/gen2/CALIB]\n"
+            )
+
+        mtime = os.stat(filename).st_mtime_ns
+        patch_dc2.replace_root(filename, "/old/gen2", "/new/gen2")
+        self.assertEqual(os.stat(filename).st_mtime_ns, mtime)
+
+    def test_break_hardlink(self):
+        filename = os.path.join(self.calib_root, TEST1_CALIB_FILES[0])
+        link_filename = filename + ".link"
+        os.link(filename, link_filename)
+        patch_dc2._break_hardlink(filename)
+        self.assertEqual(os.stat(filename).st_nlink, 1)
+        self.assertEqual(os.stat(link_filename).st_nlink, 1)
+        with open(filename, "r") as f:
+            self.assertEqual(f.read(), TEST1_CALIB_FILES[0])
+
+    @patch("lsst.dc2gen3.patch_dc2._fast_copy")
+    def test_break_hardlink_failed_copy(self, fast_copy):
+        def short_copy(src, dst):
+            with open(dst, "wb") as f:
+                f.write(b"0123456789")
+            raise OSError(errno.EIO, "Short copy")
+
+        fast_copy.side_effect = short_copy
+        filename = os.path.join(self.calib_root, "registry.sqlite3")
+        contents = os.urandom(1000)
+        with open(filename, "wb") as f:
+            f.write(contents)
+        os.link(filename, filename + ".link")
+        with self.assertRaises(OSError):
+            patch_dc2._break_hardlink(filename)
+        with open(filename, "rb") as f:
+            self.assertEqual(f.read(), contents)
+        self.assertEqual(os.stat(filename).st_nlink, 2)
+
+    @patch("lsst.dc2gen3.patch_dc2._kernel_copies")
+    @patch("lsst.dc2gen3.patch_dc2.CLONEFILE", None)
+    @patch("lsst.dc2gen3.patch_dc2.FICLONE", None)
+    def test_fast_copy_copies_nothing(self, kernel_copies):
+        # copy_file_range copies nothing on some filesystems,
+        # which must not be mistaken for reaching the end of the file.
+        kernel_copies.return_value = [lambda src_fd, dst_fd, count: 0]
+        filename = os.path.join(self.calib_root, "big.fits")
+        with open(filename, "wb") as f:
+            f.write(os.urandom(100000))
+        copy_filename = filename + ".copy"
+        patch_dc2._fast_copy(filename, copy_filename)
+        with open(filename, "rb") as f, open(copy_filename, "rb") as f_copy:
+            self.assertEqual(f_copy.read(), f.read())
+
+    @patch("lsst.dc2gen3.patch_dc2.COPY_BUFFER_SIZE", 7)
+    def test_buffered_copy(self):
+        filename = os.path.join(self.calib_root, TEST1_CALIB_FILES[0])
+        copy_filename = filename + ".copy"
+        with open(filename, "rb") as fsrc, open(copy_filename, "wb") as fdst:
+            patch_dc2._buffered_copy(fsrc.fileno(), fdst.fileno())
+        with open(copy_filename, "r") as f:
+            self.assertEqual(f.read(), TEST1_CALIB_FILES[0])
+
+    def write_options(self):
+        option_filename = os.path.join(self.calib_root, "options.yaml")
+        with open(option_filename, "w") as f:
+            f.write(
+                "origin_root: /old/gen2\n"
+                f"gen2_root: {self.calib_root}\n"
+                "reruns:\n"
+                "    - path: rerun/test\n"
+                "calibs:\n"
+                "    - path: CALIB\n"
+            )
+        return option_filename
+
+    @patch("lsst.dc2gen3.patch_dc2.update_registry", spec=True)
+    @patch("lsst.dc2gen3.patch_dc2.update_calib_registry", spec=True)
+    @patch("lsst.dc2gen3.patch_dc2.move_files", spec=True)
+    @patch("lsst.dc2gen3.patch_dc2.replace_root", spec=True)
     def test_main(self, *mocks):
-        exit_value = patch_dc2._main(
-            [TEST_CALIB_OLD_ROOT, TEST_CALIB_NEW_ROOT]
+        exit_value = patch_dc2._main([self.write_options()])
+        self.assertEqual(exit_value, 0)
+        calib_path = os.path.join(self.calib_root, "CALIB")
+        self.assertEqual(patch_dc2.replace_root.call_count, 2)
+        patch_dc2.move_files.assert_called_once_with(
+            calib_path, jobs=patch_dc2.DEFAULT_JOBS
         )
+        patch_dc2.update_calib_registry.assert_called_once_with(calib_path)
+        patch_dc2.update_registry.assert_called_once_with(self.calib_root)
+
+    @patch("lsst.dc2gen3.patch_dc2.update_registry", spec=True)
+    @patch("lsst.dc2gen3.patch_dc2.update_calib_registry", spec=True)
+    @patch("lsst.dc2gen3.patch_dc2.move_files", spec=True)
+    @patch("lsst.dc2gen3.patch_dc2.replace_root", spec=True)
+    def test_main_dry_run(self, *mocks):
+        exit_value = patch_dc2._main([self.write_options(), "--dry-run"])
         self.assertEqual(exit_value, 0)
-        copy_args = tuple(mocks[0].mock_calls[0])[1]
-        self.assertEqual(copy_args, (TEST_CALIB_OLD_ROOT, TEST_CALIB_NEW_ROOT))
+        patch_dc2.move_files.assert_called_once_with(
+            os.path.join(self.calib_root, "CALIB"),
+            jobs=patch_dc2.DEFAULT_JOBS,
+            dry_run=True,
+        )
+        patch_dc2.replace_root.assert_not_called()
+        patch_dc2.update_calib_registry.assert_not_called()
+        patch_dc2.update_registry.assert_not_called()
+
+    @patch("lsst.dc2gen3.patch_dc2.move_files", spec=True)
+    def test_main_no_jobs(self, move_files):
+        for jobs in ("0", "-2"):
+            with self.assertRaises(SystemExit), patch("sys.stderr"):
+                patch_dc2._main([self.write_options(), "--jobs", jobs])
+        move_files.assert_not_called()
 
 
 if __name__ == "__main__":